@@ -5,7 +5,7 @@ Features:
 - Checklist add/edit
 - New Audit with Score buttons (0-3)
 - Photo capture upload
-- localStorage form retention
+- IndexedDB form draft retention
 - Delete Audit
 - MIL export
 - Audit category scores + total
@@ -13,25 +13,86 @@ Features:
 - PWA support: manifest.json + service worker + add to home screen
 Compatible with Flask 3.x and Python 3.12+
 """
-from flask import Flask, request, redirect, url_for, render_template_string, send_file, flash
+from flask import Flask, request, redirect, url_for, send_file, flash
+from jinja2 import ChoiceLoader, DictLoader
 from werkzeug.utils import secure_filename
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain
+import io
 import os
-import pandas as pd
+from openpyxl import Workbook
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+MIL_SHEET_ROWS = 50000
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
 STATIC_FOLDER = os.path.join(BASE_DIR, 'static')
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(STATIC_FOLDER, exist_ok=True)
+# isdir is one stat; makedirs(exist_ok=True) would stat every parent on
+# each worker start.
+for _folder in (UPLOAD_FOLDER, STATIC_FOLDER):
+    if not os.path.isdir(_folder):
+        os.makedirs(_folder)
+
+# Photo files are written off the request thread so a multi-photo audit
+# submission only pays for the DB commit before responding.
+# Tasks run on 4 workers, so submission order is not execution order:
+# deleting an audit immediately after creating it can unlink a photo
+# before its pending write lands, leaving an orphaned file behind. That
+# is accepted; orphans are harmless and uploads/ can be swept offline.
+PHOTO_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+def _log_photo_task(future):
+    exc = future.exception()
+    if exc is not None:
+        app.logger.error('Background photo task failed', exc_info=exc)
+
+def _unlink_photos(paths):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def _write_photo(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        # Photos are write-once and rarely re-read; tell the kernel not to
+        # keep their pages in the cache (Linux only). The pages must be
+        # clean first — fadvise will not drop dirty ones — so fsync before
+        # the hint; this runs on the executor, not the request thread.
+        if hasattr(os, 'posix_fadvise'):
+            os.fsync(f.fileno())
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
 
 app = Flask(__name__)
 app.secret_key = 'dev-secret'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(BASE_DIR, 'audit.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_pre_ping': True,
+                                           'connect_args': {'check_same_thread': False}}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    """WAL lets readers proceed while an audit submission is committing;
+    the remaining pragmas trade a little durability for write latency and
+    give SQLite a bigger page cache."""
+    cur = dbapi_conn.cursor()
+    cur.execute('PRAGMA foreign_keys=ON')
+    cur.execute('PRAGMA journal_mode=WAL')
+    cur.execute('PRAGMA synchronous=NORMAL')
+    cur.execute('PRAGMA cache_size=-20000')
+    cur.execute('PRAGMA temp_store=MEMORY')
+    cur.execute('PRAGMA mmap_size=268435456')
+    cur.close()
+
 db = SQLAlchemy(app)
 
 # ---- Models ----
@@ -41,7 +102,7 @@ class Category(db.Model):
 
 class ChecklistItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), index=True)
     category = db.relationship('Category', backref='items')
     text = db.Column(db.String(500), nullable=False)
     original_spec = db.Column(db.Text, nullable=True)
@@ -49,23 +110,37 @@ class ChecklistItem(db.Model):
 class Audit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     vendor = db.Column(db.String(200), nullable=False)
-    audit_date = db.Column(db.Date, nullable=False)
+    audit_date = db.Column(db.Date, nullable=False, index=True)
     audit_area = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # passive_deletes stops the ORM from loading and deleting the items
+    # one by one; delete_audit clears them with a single bulk DELETE
+    # (and new schemas also cascade via the FK).
+    audit_items = db.relationship('AuditItem', backref='audit',
+                                  cascade='all, delete-orphan',
+                                  passive_deletes=True)
 
 class AuditItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    audit_id = db.Column(db.Integer, db.ForeignKey('audit.id'))
-    audit = db.relationship('Audit', backref='audit_items')
-    checklist_item_id = db.Column(db.Integer, db.ForeignKey('checklist_item.id'))
+    audit_id = db.Column(db.Integer, db.ForeignKey('audit.id', ondelete='CASCADE'),
+                         index=True)
+    checklist_item_id = db.Column(db.Integer, db.ForeignKey('checklist_item.id'), index=True)
     checklist_item = db.relationship('ChecklistItem')
     score = db.Column(db.Integer, nullable=True)
     record = db.Column(db.Text, nullable=True)
     photo_filename = db.Column(db.String(300), nullable=True)
 
 # ---- DB init ----
-with app.app_context():
+@app.cli.command('init-db')
+def init_db():
+    """Create tables and indexes. Run once via `flask init-db` instead of
+    probing the schema on every worker start."""
     db.create_all()
+    # create_all skips tables that already exist, so backfill the indexes on
+    # databases created before they were declared on the models.
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
 
 # ---- Base Template ----
 BASE_TEMPLATE = '''
@@ -109,36 +184,39 @@ BASE_TEMPLATE = '''
           {% endfor %}
         {% endif %}
       {% endwith %}
-      {{ content|safe }}
+      {% block content %}{% endblock %}
     </div>
     <script>
       function selectScore(itemId, score) {
           const buttons = document.querySelectorAll(`.score-btn[data-item='${itemId}']`);
           buttons.forEach(btn => btn.classList.remove('score-selected'));
           document.querySelector(`#score_${itemId}_${score}`).classList.add('score-selected');
-          document.querySelector(`#score_input_${itemId}`).value = score;
+          const input = document.querySelector(`#score_input_${itemId}`);
+          input.value = score;
+          input.dispatchEvent(new Event('input', {bubbles: true}));
       }
-
+    </script>
+    <script type="module">
+      // Form retention in IndexedDB: the old localStorage version
+      // re-serialized the whole form synchronously on every keystroke,
+      // blocking the main thread; idb-keyval writes only the changed
+      // field and is async.
+      import {set, get, del, keys} from 'https://cdn.jsdelivr.net/npm/idb-keyval@6/+esm';
       const form = document.querySelector('form');
       if (form) {
-          const storageKey = 'new_audit_form';
-          const saved = localStorage.getItem(storageKey);
-          if(saved){
-              const data = JSON.parse(saved);
-              for(const key in data){
-                  const el = document.querySelector(`[name='${key}']`);
-                  if(el && el.type !== 'file') el.value = data[key];
-              }
+          const prefix = 'new_audit_form.';
+          const formKeys = async () =>
+              (await keys()).filter(k => typeof k === 'string' && k.startsWith(prefix));
+          for (const k of await formKeys()) {
+              const el = form.querySelector(`[name='${k.slice(prefix.length)}']`);
+              if (el && el.type !== 'file') el.value = await get(k);
           }
-          form.addEventListener('input', ()=>{
-              const data = {};
-              form.querySelectorAll('input, textarea, select').forEach(el=>{
-                  if(el.type !== 'file') data[el.name] = el.value;
-              });
-              localStorage.setItem(storageKey, JSON.stringify(data));
+          form.addEventListener('input', (e) => {
+              const el = e.target;
+              if (el.name && el.type !== 'file') set(prefix + el.name, el.value);
           });
-          form.addEventListener('submit', ()=>{
-              localStorage.removeItem(storageKey);
+          form.addEventListener('submit', async () => {
+              for (const k of await formKeys()) del(k);
           });
       }
     </script>
@@ -146,10 +224,13 @@ BASE_TEMPLATE = '''
 </html>
 '''
 
-# ---- Home ----
-@app.route('/')
-def home():
-    content = '''
+# ---- Page Templates ----
+# Pages extend the base and loop in Jinja instead of building HTML with
+# repeated Python string concatenation; this also restores autoescaping
+# for user-entered text that the old content|safe slot bypassed.
+HOME_TEMPLATE = '''
+{% extends "base.html" %}
+{% block content %}
     <div class="text-center mt-5">
         <h2>Welcome to Sustaining Audit</h2>
         <p>Use the navigation buttons above to manage Checklist, Audits, or export MIL.</p>
@@ -157,8 +238,93 @@ def home():
         <a class="btn btn-secondary mt-3 ms-2" href="/checklist">Go to Checklist</a>
         <a class="btn btn-success mt-3 ms-2" href="/audits/new">Create New Audit</a>
     </div>
-    '''
-    return render_template_string(BASE_TEMPLATE, content=content)
+{% endblock %}
+'''
+
+CHECKLIST_TEMPLATE = '''
+{% extends "base.html" %}
+{% block content %}
+<h4>Add Category</h4>
+<form method='post'><input name='category_name' class='form-control mb-2' placeholder='Category Name' required><button class='btn btn-primary mb-3'>Add Category</button></form>
+<h4>Add Checklist Item</h4>
+<form method='post'>
+  <select name='category_id' class='form-select mb-2' required>
+  {% for c in categories %}<option value='{{ c.id }}'>{{ c.name }}</option>{% endfor %}
+  </select>
+  <input name='item_text' class='form-control mb-2' placeholder='Checklist Item Text' required>
+  <input name='original_spec' class='form-control mb-2' placeholder='Original Spec (optional)'>
+  <button class='btn btn-primary mb-3'>Add Checklist Item</button>
+</form>
+<h4>Existing Checklist Items</h4>
+{% for i in items %}
+<form method='post' class='mb-2 border p-2 rounded'>
+  <input type='hidden' name='item_id' value='{{ i.id }}'>
+  <input name='item_text' class='form-control mb-1' value='{{ i.text }}' required>
+  <input name='original_spec' class='form-control mb-1' value='{{ i.original_spec or "" }}'>
+  <button class='btn btn-sm btn-success'>Save</button>
+</form>
+{% endfor %}
+{% endblock %}
+'''
+
+AUDITS_TEMPLATE = '''
+{% extends "base.html" %}
+{% block content %}
+<div class='d-flex justify-content-between align-items-center'><h4>Audits</h4>
+<a class='btn btn-primary' href='/audits/new'>New Audit</a></div>
+<ul class='mt-3'>
+{% for a in audits %}
+  <li><strong>{{ a.vendor }} - {{ a.audit_date }} - {{ a.audit_area }}</strong>
+  <a href='/audits/delete/{{ a.id }}' class='btn btn-sm btn-danger ms-2'>Delete</a>
+  <a href='/audits/export/{{ a.id }}' class='btn btn-sm btn-success ms-1'>Export Excel</a><br>
+  {% for cat, pct in aggregates[a.id]['categories'] %}<small>{{ cat }}: {{ '%.1f'|format(pct) }}%</small> &nbsp;{% endfor %}
+  <small>Total: {{ '%.1f'|format(aggregates[a.id]['total']) }}%</small></li>
+{% endfor %}
+</ul>
+{% if pagination.pages > 1 %}
+<nav><ul class='pagination'>
+  {% if pagination.has_prev %}<li class='page-item'><a class='page-link' href='?page={{ pagination.prev_num }}'>Previous</a></li>{% endif %}
+  <li class='page-item disabled'><span class='page-link'>Page {{ pagination.page }} of {{ pagination.pages }}</span></li>
+  {% if pagination.has_next %}<li class='page-item'><a class='page-link' href='?page={{ pagination.next_num }}'>Next</a></li>{% endif %}
+</ul></nav>
+{% endif %}
+{% endblock %}
+'''
+
+NEW_AUDIT_TEMPLATE = '''
+{% extends "base.html" %}
+{% block content %}
+<h4>Create New Audit</h4>
+<form method='post' enctype='multipart/form-data'>
+<input name='vendor' class='form-control mb-2' placeholder='Vendor' required>
+<input type='date' name='audit_date' class='form-control mb-2' required>
+<input name='audit_area' class='form-control mb-2' placeholder='Audit Area' required>
+<h5>Checklist Items</h5>
+{% set score_values = range(4) %}
+{% for i in items %}
+<div class='mb-3 border p-2 rounded'><strong>{{ i.text }} ({{ i.category.name }})</strong><br>
+Score: <input type='hidden' name='score_{{ i.id }}' id='score_input_{{ i.id }}'>
+{% for s in score_values %}<button type='button' class='btn btn-outline-primary score-btn' id='score_{{ i.id }}_{{ s }}' data-item='{{ i.id }}' onclick='selectScore({{ i.id }},{{ s }})'>{{ s }}</button>{% endfor %}
+<br>Record/Comments: <input type='text' name='record_{{ i.id }}' class='form-control mb-1'>
+Photo: <input type='file' name='photo_{{ i.id }}' class='form-control' accept='image/*' capture></div>
+{% endfor %}
+<button class='btn btn-primary'>Create Audit</button></form>
+{% endblock %}
+'''
+
+# Register the base under a loader so the page templates can extend it,
+# then compile each page once at import time.
+app.jinja_loader = ChoiceLoader([DictLoader({'base.html': BASE_TEMPLATE}),
+                                 app.jinja_loader])
+HOME_T = app.jinja_env.from_string(HOME_TEMPLATE)
+CHECKLIST_T = app.jinja_env.from_string(CHECKLIST_TEMPLATE)
+AUDITS_T = app.jinja_env.from_string(AUDITS_TEMPLATE)
+NEW_AUDIT_T = app.jinja_env.from_string(NEW_AUDIT_TEMPLATE)
+
+# ---- Home ----
+@app.route('/')
+def home():
+    return HOME_T.render()
 
 # ---- Checklist ----
 @app.route('/checklist', methods=['GET','POST'])
@@ -166,17 +332,29 @@ def checklist():
     if request.method=='POST':
         if 'category_name' in request.form:
             name = request.form['category_name'].strip()
-            if name and not Category.query.filter_by(name=name).first():
-                db.session.add(Category(name=name))
+            inserted = 0
+            if name:
+                # INSERT OR IGNORE collapses the exists-check SELECT and the
+                # INSERT into one round-trip; the unique index on name decides.
+                # Insert against the Table so this takes the Core path and the
+                # result is a CursorResult with a usable rowcount (the ORM
+                # bulk path returns an IteratorResult without one).
+                result = db.session.execute(
+                    db.insert(Category.__table__).prefix_with('OR IGNORE'),
+                    {'name': name})
                 db.session.commit()
+                inserted = result.rowcount
+            if inserted:
                 flash('Category added')
             else:
                 flash('Category exists or empty')
             return redirect('/checklist')
         elif 'item_id' in request.form:
-            item = ChecklistItem.query.get(int(request.form['item_id']))
-            item.text = request.form['item_text']
-            item.original_spec = request.form.get('original_spec','')
+            db.session.execute(
+                db.update(ChecklistItem)
+                .where(ChecklistItem.id == int(request.form['item_id']))
+                .values(text=request.form['item_text'],
+                        original_spec=request.form.get('original_spec','')))
             db.session.commit()
             flash('Checklist item updated')
             return redirect('/checklist')
@@ -191,52 +369,40 @@ def checklist():
             return redirect('/checklist')
     categories = Category.query.order_by(Category.name).all()
     items = ChecklistItem.query.order_by(ChecklistItem.id).all()
-    content = "<h4>Add Category</h4><form method='post'><input name='category_name' class='form-control mb-2' placeholder='Category Name' required><button class='btn btn-primary mb-3'>Add Category</button></form>"
-    content += "<h4>Add Checklist Item</h4><form method='post'><select name='category_id' class='form-select mb-2' required>"
-    for c in categories:
-        content += f"<option value='{c.id}'>{c.name}</option>"
-    content += "</select><input name='item_text' class='form-control mb-2' placeholder='Checklist Item Text' required>"
-    content += "<input name='original_spec' class='form-control mb-2' placeholder='Original Spec (optional)'>"
-    content += "<button class='btn btn-primary mb-3'>Add Checklist Item</button></form><h4>Existing Checklist Items</h4>"
-    for i in items:
-        content += f"<form method='post' class='mb-2 border p-2 rounded'><input type='hidden' name='item_id' value='{i.id}'>"
-        content += f"<input name='item_text' class='form-control mb-1' value='{i.text}' required>"
-        content += f"<input name='original_spec' class='form-control mb-1' value='{i.original_spec or ''}'>"
-        content += "<button class='btn btn-sm btn-success'>Save</button></form>"
-    return render_template_string(BASE_TEMPLATE, content=content)
+    return CHECKLIST_T.render(categories=categories, items=items)
 
 # ---- Audits List ----
 @app.route('/audits')
 def audits_list():
-    audits = Audit.query.order_by(Audit.audit_date.desc()).all()
-    content = "<div class='d-flex justify-content-between align-items-center'><h4>Audits</h4>"
-    content += "<a class='btn btn-primary' href='/audits/new'>New Audit</a></div><ul class='mt-3'>"
-    for a in audits:
-        category_scores = {}
-        total_score = 0
-        total_items = 0
-        for ai in a.audit_items:
-            cat = ai.checklist_item.category.name
-            if cat not in category_scores: category_scores[cat] = {'sum':0,'count':0}
-            if ai.score is not None: category_scores[cat]['sum'] += ai.score
-            category_scores[cat]['count'] += 1
-            if ai.score is not None: total_score += ai.score
-            total_items +=1
-        content += f"<li><strong>{a.vendor} - {a.audit_date} - {a.audit_area}</strong>"
-        content += f" <a href='/audits/delete/{a.id}' class='btn btn-sm btn-danger ms-2'>Delete</a>"
-        content += f" <a href='/audits/export/{a.id}' class='btn btn-sm btn-success ms-1'>Export Excel</a><br>"
-        for cat, sc in category_scores.items():
-            pct = (sc['sum'] / (sc['count']*3)*100) if sc['count'] else 0
-            content += f"<small>{cat}: {pct:.1f}%</small> &nbsp;"
-        total_pct = (total_score/(total_items*3)*100) if total_items else 0
-        content += f"<small>Total: {total_pct:.1f}%</small></li>"
-    content += "</ul>"
-    return render_template_string(BASE_TEMPLATE, content=content)
+    page = request.args.get('page', 1, type=int)
+    # Project just the listed columns; row tuples skip identity-map and
+    # instrumented-attribute setup and leave created_at behind.
+    pagination = (db.session.query(Audit.id, Audit.vendor, Audit.audit_date,
+                                   Audit.audit_area)
+                  .order_by(Audit.audit_date.desc())
+                  .paginate(page=page, per_page=50, error_out=False))
+    audits = pagination.items
+    # One grouped query for all per-category sums/counts instead of lazy-loading
+    # every AuditItem -> ChecklistItem -> Category per audit (N+1).
+    agg_rows = (db.session.query(AuditItem.audit_id, Category.name,
+                                 db.func.sum(AuditItem.score), db.func.count(AuditItem.id))
+                .join(ChecklistItem, ChecklistItem.id == AuditItem.checklist_item_id)
+                .join(Category, Category.id == ChecklistItem.category_id)
+                .filter(AuditItem.audit_id.in_([a.id for a in audits]))
+                .group_by(AuditItem.audit_id, Category.name).all())
+    aggregates = {a.id: {'categories': [], 'sum': 0, 'count': 0} for a in audits}
+    for audit_id, cat, score_sum, count in agg_rows:
+        agg = aggregates[audit_id]
+        agg['categories'].append((cat, ((score_sum or 0)/(count*3)*100) if count else 0))
+        agg['sum'] += score_sum or 0
+        agg['count'] += count
+    for agg in aggregates.values():
+        agg['total'] = (agg['sum']/(agg['count']*3)*100) if agg['count'] else 0
+    return AUDITS_T.render(audits=audits, aggregates=aggregates, pagination=pagination)
 
 # ---- New Audit ----
 @app.route('/audits/new', methods=['GET','POST'])
 def new_audit():
-    categories = Category.query.order_by(Category.name).all()
     items = ChecklistItem.query.order_by(ChecklistItem.id).all()
     if request.method=='POST':
         vendor = request.form['vendor']
@@ -245,6 +411,7 @@ def new_audit():
         audit = Audit(vendor=vendor, audit_date=audit_date, audit_area=audit_area)
         db.session.add(audit)
         db.session.commit()
+        values = []
         for item in items:
             score = request.form.get(f'score_{item.id}')
             record = request.form.get(f'record_{item.id}')
@@ -252,39 +419,43 @@ def new_audit():
             filename = None
             if photo and photo.filename:
                 filename = secure_filename(f"{audit.id}_{item.id}_{photo.filename}")
-                photo.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            audit_item = AuditItem(audit_id=audit.id, checklist_item_id=item.id,
-                                   score=int(score) if score else None,
-                                   record=record, photo_filename=filename)
-            db.session.add(audit_item)
+                # The upload must be drained before the request ends, but the
+                # disk write itself can happen in the background.
+                data = photo.stream.read()
+                PHOTO_EXECUTOR.submit(
+                    _write_photo,
+                    os.path.join(app.config['UPLOAD_FOLDER'], filename),
+                    data).add_done_callback(_log_photo_task)
+            values.append({'audit_id': audit.id, 'checklist_item_id': item.id,
+                           'score': int(score) if score else None,
+                           'record': record, 'photo_filename': filename})
+        if values:
+            db.session.execute(db.insert(AuditItem), values)
         db.session.commit()
         flash('Audit created successfully!')
         return redirect(url_for('audits_list'))
 
-    content = "<h4>Create New Audit</h4><form method='post' enctype='multipart/form-data'>"
-    content += "<input name='vendor' class='form-control mb-2' placeholder='Vendor' required>"
-    content += "<input type='date' name='audit_date' class='form-control mb-2' required>"
-    content += "<input name='audit_area' class='form-control mb-2' placeholder='Audit Area' required>"
-    content += "<h5>Checklist Items</h5>"
-    for i in items:
-        content += f"<div class='mb-3 border p-2 rounded'><strong>{i.text} ({i.category.name})</strong><br>"
-        content += f"Score: <input type='hidden' name='score_{i.id}' id='score_input_{i.id}'>"
-        for s in range(4):
-            content += f"<button type='button' class='btn btn-outline-primary score-btn' id='score_{i.id}_{s}' data-item='{i.id}' onclick='selectScore({i.id},{s})'>{s}</button>"
-        content += f"<br>Record/Comments: <input type='text' name='record_{i.id}' class='form-control mb-1'>"
-        content += f"Photo: <input type='file' name='photo_{i.id}' class='form-control' accept='image/*' capture></div>"
-    content += "<button class='btn btn-primary'>Create Audit</button></form>"
-    return render_template_string(BASE_TEMPLATE, content=content)
+    return NEW_AUDIT_T.render(items=items)
 
 # ---- Delete Audit ----
 @app.route('/audits/delete/<int:audit_id>')
 def delete_audit(audit_id):
     audit = Audit.query.get_or_404(audit_id)
-    for ai in audit.audit_items:
-        if ai.photo_filename:
-            try: os.remove(os.path.join(app.config['UPLOAD_FOLDER'], ai.photo_filename))
-            except: pass
-        db.session.delete(ai)
+    filenames = [name for (name,) in
+                 db.session.query(AuditItem.photo_filename)
+                 .filter(AuditItem.audit_id == audit_id,
+                         AuditItem.photo_filename.isnot(None))]
+    if filenames:
+        # Unlink in the background so the response does not wait on one
+        # syscall per photo.
+        PHOTO_EXECUTOR.submit(_unlink_photos,
+                              [os.path.join(app.config['UPLOAD_FOLDER'], name)
+                               for name in filenames]
+                              ).add_done_callback(_log_photo_task)
+    # One bulk DELETE for the items rather than relying on ON DELETE
+    # CASCADE: databases created before the FK gained the cascade would
+    # fail the foreign-key check on the parent delete alone.
+    db.session.execute(db.delete(AuditItem).where(AuditItem.audit_id == audit_id))
     db.session.delete(audit)
     db.session.commit()
     flash('Audit deleted successfully.')
@@ -294,44 +465,67 @@ def delete_audit(audit_id):
 @app.route('/audits/export/<int:audit_id>')
 def export_audit(audit_id):
     audit = Audit.query.get_or_404(audit_id)
-    rows = []
+    # Write-only workbook streams rows straight to the file instead of going
+    # through pandas' cell-by-cell styling pipeline.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Audit')
+    ws.append(['No', 'Category', 'Checking Item', 'Score', 'Record',
+               'Vendor', 'Audit Date', 'Audit Area'])
+    # The audit columns repeat on every row; read the instrumented
+    # attributes once instead of per row.
+    vendor, audit_date, audit_area = audit.vendor, audit.audit_date, audit.audit_area
     for idx, ai in enumerate(audit.audit_items, start=1):
-        rows.append({'No': idx,
-                     'Category': ai.checklist_item.category.name,
-                     'Checking Item': ai.checklist_item.text,
-                     'Score': ai.score,
-                     'Record': ai.record or '',
-                     'Vendor': audit.vendor,
-                     'Audit Date': audit.audit_date,
-                     'Audit Area': audit.audit_area})
-    df = pd.DataFrame(rows)
-    out_path = os.path.join(BASE_DIR, f'audit_{audit.id}_{datetime.utcnow().strftime("%Y%m%d%H%M%S")}.xlsx')
-    df.to_excel(out_path, index=False)
-    return send_file(out_path, as_attachment=True)
+        item = ai.checklist_item
+        ws.append([idx, item.category.name, item.text, ai.score,
+                   ai.record or '', vendor, audit_date, audit_area])
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return send_file(buf, as_attachment=True, mimetype=XLSX_MIMETYPE,
+                     download_name=f'audit_{audit.id}_{datetime.utcnow().strftime("%Y%m%d%H%M%S")}.xlsx')
 
 # ---- MIL Export ----
 @app.route('/export_mil')
 def export_mil():
-    rows=[]
-    q = AuditItem.query.filter(AuditItem.score!=3).order_by(AuditItem.id).all()
-    for idx, ai in enumerate(q,start=1):
-        rows.append({'No':idx,
-                     'Checking item':ai.checklist_item.text,
-                     'Category':ai.checklist_item.category.name,
-                     'Record':ai.record or '',
-                     'Status':'Open' if ai.score is None or ai.score<3 else 'Closed',
-                     'Action':'',
-                     'Vendor DRI':ai.audit.vendor,
-                     'Due Date':'',
-                     'Closed date':'',
-                     'Remark':''})
-    if not rows:
+    # Join once and project only the exported columns; the old ORM loop
+    # lazy-loaded checklist_item, category and audit for every row.
+    rows_iter = (db.session.query(ChecklistItem.text, Category.name,
+                                  AuditItem.record, AuditItem.score, Audit.vendor)
+                 .select_from(AuditItem)
+                 .join(ChecklistItem, ChecklistItem.id == AuditItem.checklist_item_id)
+                 .join(Category, Category.id == ChecklistItem.category_id)
+                 .join(Audit, Audit.id == AuditItem.audit_id)
+                 .filter(AuditItem.score != 3)
+                 .order_by(AuditItem.id).yield_per(1000))
+    # Peek before creating the workbook: a write-only worksheet abandoned on
+    # the empty path would leak its temp file and warn on GC.
+    row_stream = iter(rows_iter)
+    first = next(row_stream, None)
+    if first is None:
         flash('No MIL items.')
         return redirect('/')
-    df = pd.DataFrame(rows)
-    out_path = os.path.join(BASE_DIR,f'mil_export_{datetime.utcnow().strftime("%Y%m%d%H%M%S")}.xlsx')
-    df.to_excel(out_path,index=False)
-    return send_file(out_path,as_attachment=True)
+    headers = ['No', 'Checking item', 'Category', 'Record', 'Status', 'Action',
+               'Vendor DRI', 'Due Date', 'Closed date', 'Remark']
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('MIL')
+    ws.append(headers)
+    sheet_rows = 0
+    for idx, (text, cat, record, score, vendor) in enumerate(chain([first], row_stream), start=1):
+        if sheet_rows == MIL_SHEET_ROWS:
+            # Segment huge exports into 50k-row sheets; one giant sheet is
+            # slow to open and pushes Excel's row limit.
+            ws = wb.create_sheet(f'MIL {idx // MIL_SHEET_ROWS + 1}')
+            ws.append(headers)
+            sheet_rows = 0
+        ws.append([idx, text, cat, record or '',
+                   'Open' if score is None or score<3 else 'Closed',
+                   '', vendor, '', '', ''])
+        sheet_rows += 1
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return send_file(buf, as_attachment=True, mimetype=XLSX_MIMETYPE,
+                     download_name=f'mil_export_{datetime.utcnow().strftime("%Y%m%d%H%M%S")}.xlsx')
 
 if __name__=='__main__':
     app.run(debug=True)
@@ -0,0 +1,9 @@
+"""WSGI entry point for production servers.
+
+Run with:
+    gunicorn -w $(nproc) --threads 4 wsgi:app
+"""
+from sustaining_audit_app import app
+
+if __name__ == '__main__':
+    app.run()